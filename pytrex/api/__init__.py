@@ -1,3 +1,38 @@
+import json
 from collections import namedtuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 RpcCmdData = namedtuple("RpcCmdData", ["method", "params", "api_class"])
+
+
+# JSON codec, orjson when installed (pip install pytrex[orjson]) else json - see setup.cfg for the differences between them.
+
+
+def json_dumps(obj) -> bytes:
+    """Encode object to compact UTF-8 JSON bytes."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def json_pretty(obj, sort_keys: bool = False) -> str:
+    """Format object as JSON indented by 2 spaces, for logs and prints.
+
+    :param obj: object to format.
+    :param sort_keys: True - sort keys, False - keep keys in object order.
+    """
+    if orjson:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2, sort_keys=sort_keys)
+
+
+def json_loads(buffer):
+    """Decode UTF-8 JSON from bytes like object."""
+    if orjson:
+        return orjson.loads(buffer)
+    return json.loads(bytes(buffer))
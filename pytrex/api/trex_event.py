@@ -1,19 +1,21 @@
-import datetime
-import re
 import time
 import traceback
+from collections import deque
 
 from ..text_opts import format_text
 
 
 # an event
 class Event(object):
+    __slots__ = ("origin", "ev_type", "msg", "ts")
+
     def __init__(self, origin, ev_type, msg):
         self.origin = origin
         self.ev_type = ev_type
         self.msg = msg
 
-        self.ts = datetime.datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S")
+        lt = time.localtime()
+        self.ts = f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} {lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
 
     def __str__(self):
 
@@ -36,15 +38,31 @@ class EventsHandler:
 
     EVENT_SERVER_STOPPED = 100
 
+    # oldest events are dropped once the log is full
+    EVENTS_MAXLEN = 4096
+
     def __init__(self, client):
         self.client = client
         self.logger = self.client.logger
 
-        self.events = []
+        self.events = deque(maxlen=self.EVENTS_MAXLEN)
 
         # events are disabled by default until explicitly enabled
         self.enabled = False
 
+        self._event_handlers = {
+            self.EVENT_PORT_STARTED: self._on_port_started,
+            self.EVENT_PORT_STOPPED: self._on_port_stopped,
+            self.EVENT_PORT_PAUSED: self._on_port_paused,
+            self.EVENT_PORT_RESUMED: self._on_port_resumed,
+            self.EVENT_PORT_JOB_DONE: self._on_port_job_done,
+            self.EVENT_PORT_ACQUIRED: self._on_port_acquired,
+            self.EVENT_PORT_RELEASED: self._on_port_released,
+            self.EVENT_PORT_ERROR: self._on_port_error,
+            self.EVENT_PORT_ATTR_CHG: self._on_port_attr_changed,
+            self.EVENT_SERVER_STOPPED: self._on_server_stopped,
+        }
+
     # will start handling events
 
     def enable(self):
@@ -60,12 +78,13 @@ class EventsHandler:
 
     def get_events(self, *types: str) -> list:
         if types:
+            types = set(types)
             return [ev for ev in self.events if ev.ev_type in types]
         else:
-            return [ev for ev in self.events]
+            return list(self.events)
 
     def clear_events(self) -> None:
-        self.events = []
+        self.events.clear()
 
     def log_warning(self, msg):
         self.__add_event_log("local", "warning", msg)
@@ -74,8 +93,7 @@ class EventsHandler:
 
     def on_async_timeout(self, timeout_sec):
         if self.client.conn.is_connected():
-            msg = "Connection lost - Subscriber timeout: no data from TRex "
-            +"server for more than {0} seconds".format(timeout_sec)
+            msg = f"Connection lost - Subscriber timeout: no data from TRex server for more than {timeout_sec} seconds"
             self.log_warning(msg)
 
             # we cannot simply disconnect the connection - we mark it for disconnection
@@ -94,38 +112,34 @@ class EventsHandler:
         pass
 
     def on_async_rx_stats_event(self, data, baseline):
-        if not self.is_enabled():
+        if not self.enabled:
             return
 
         self.client.flow_stats.update(data, baseline)
 
     def on_async_latency_stats_event(self, data, baseline):
-        if not self.is_enabled():
+        if not self.enabled:
             return
 
         self.client.latency_stats.update(data, baseline)
 
     # handles an async stats update from the subscriber
     def on_async_stats_update(self, dump_data, baseline):
-        if not self.is_enabled():
+        if not self.enabled:
             return
 
         global_stats = {}
         port_stats = {}
+        ports = self.client.ports
 
         # filter the values per port and general
-        for key, value in list(dump_data.items()):
-            # match a pattern of ports
-            m = re.search(r"(.*)\-(\d+)", key)
-            if m:
-                port_id = int(m.group(2))
-                field_name = m.group(1)
-                if port_id in self.client.ports:
-                    if port_id not in port_stats:
-                        port_stats[port_id] = {}
-                    port_stats[port_id][field_name] = value
-                else:
-                    continue
+        for key, value in dump_data.items():
+            # port counters keys are <field name>-<port id>
+            field_name, sep, port_id = key.rpartition("-")
+            if sep and port_id.isdecimal():
+                port_id = int(port_id)
+                if port_id in ports:
+                    port_stats.setdefault(port_id, {})[field_name] = value
             else:
                 # no port match - general stats
                 global_stats[key] = value
@@ -134,148 +148,125 @@ class EventsHandler:
         self.client.global_stats.update(global_stats, baseline)
 
         # update all ports
-        for port_id, data in list(port_stats.items()):
-            self.client.ports[port_id].port_stats.update(data, baseline)
+        for port_id, data in port_stats.items():
+            ports[port_id].port_stats.update(data, baseline)
 
     # dispatcher for server async events(port started, port stopped and etc.)
 
     def on_async_event(self, event_id, data):
-        if not self.is_enabled():
+        if not self.enabled:
             return
 
-        # default type info and do not show
-        ev_type = "info"
-        show_event = False
-
-        # port started
-        if event_id == self.EVENT_PORT_STARTED:
-            port_id = int(data["port_id"])
-            ev = "Port {0} has started".format(port_id)
-            self.__async_event_port_started(port_id)
-
-        # port stopped
-        elif event_id == self.EVENT_PORT_STOPPED:
-            port_id = int(data["port_id"])
-            ev = "Port {0} has stopped".format(port_id)
+        handler = self._event_handlers.get(event_id)
+        if handler is None:
+            # unknown event - ignore
+            return
 
-            # call the handler
-            self.__async_event_port_stopped(port_id)
+        # handlers return (event message, event type, show event) or None to drop the event
+        event = handler(data)
+        if event is None:
+            return
 
-        # port paused
-        elif event_id == self.EVENT_PORT_PAUSED:
-            port_id = int(data["port_id"])
-            ev = "Port {0} has paused".format(port_id)
+        # showed events(port job done,
+        self.__add_event_log("server", *event)
 
-            # call the handler
-            self.__async_event_port_paused(port_id)
+    # server async events handlers
 
-        # port resumed
-        elif event_id == self.EVENT_PORT_RESUMED:
-            port_id = int(data["port_id"])
-            ev = "Port {0} has resumed".format(port_id)
+    def _on_port_started(self, data):
+        port_id = int(data["port_id"])
+        self.__async_event_port_started(port_id)
+        return "Port {0} has started".format(port_id), "info", False
 
-            # call the handler
-            self.__async_event_port_resumed(port_id)
+    def _on_port_stopped(self, data):
+        port_id = int(data["port_id"])
+        self.__async_event_port_stopped(port_id)
+        return "Port {0} has stopped".format(port_id), "info", False
 
-        # port finished traffic
-        elif event_id == self.EVENT_PORT_JOB_DONE:
-            port_id = int(data["port_id"])
-            ev = "Port {0} job done".format(port_id)
+    def _on_port_paused(self, data):
+        port_id = int(data["port_id"])
+        self.__async_event_port_paused(port_id)
+        return "Port {0} has paused".format(port_id), "info", False
 
-            # call the handler
-            self.__async_event_port_job_done(port_id)
+    def _on_port_resumed(self, data):
+        port_id = int(data["port_id"])
+        self.__async_event_port_resumed(port_id)
+        return "Port {0} has resumed".format(port_id), "info", False
 
-            # mark the event for show
-            show_event = True
+    def _on_port_job_done(self, data):
+        # port finished traffic, mark the event for show
+        port_id = int(data["port_id"])
+        self.__async_event_port_job_done(port_id)
+        return "Port {0} job done".format(port_id), "info", True
 
+    def _on_port_acquired(self, data):
         # port was acquired - maybe stolen...
-        elif event_id == self.EVENT_PORT_ACQUIRED:
-            session_id = data["session_id"]
-
-            port_id = int(data["port_id"])
-            who = data["who"]
-            force = data["force"]
-
-            # if we hold the port and it was not taken by this session - show it
-            if port_id in self.client.get_acquired_ports() and session_id != self.client.session_id:
-                ev_type = "warning"
-
-            # format the thief/us...
-            if session_id == self.client.session_id:
-                user = "you"
-            elif who == self.client.username:
-                user = "another session of you"
-            else:
-                user = "'{0}'".format(who)
+        session_id = data["session_id"]
+        port_id = int(data["port_id"])
+        who = data["who"]
 
-            if force:
-                ev = "Port {0} was forcely taken by {1}".format(port_id, user)
-            else:
-                ev = "Port {0} was taken by {1}".format(port_id, user)
-
-            # call the handler in case its not this session
-            if session_id != self.client.session_id:
-                self.__async_event_port_acquired(port_id, who)
-
-        # port was released
-        elif event_id == self.EVENT_PORT_RELEASED:
-            port_id = int(data["port_id"])
-            who = data["who"]
-            session_id = data["session_id"]
-
-            if session_id == self.client.session_id:
-                user = "you"
-            elif who == self.client.username:
-                user = "another session of you"
-            else:
-                user = "'{0}'".format(who)
-
-            ev = "Port {0} was released by {1}".format(port_id, user)
+        # if we hold the port and it was not taken by this session - show it
+        ev_type = "info"
+        if port_id in self.client.get_acquired_ports() and session_id != self.client.session_id:
+            ev_type = "warning"
 
-            # call the handler in case its not this session
-            if session_id != self.client.session_id:
-                self.__async_event_port_released(port_id)
+        user = self.__event_user(session_id, who)
+        if data["force"]:
+            ev = "Port {0} was forcely taken by {1}".format(port_id, user)
+        else:
+            ev = "Port {0} was taken by {1}".format(port_id, user)
 
-        elif event_id == self.EVENT_PORT_ERROR:
-            port_id = int(data["port_id"])
-            ev = "port {0} job failed".format(port_id)
-            ev_type = "warning"
+        # call the handler in case its not this session
+        if session_id != self.client.session_id:
+            self.__async_event_port_acquired(port_id, who)
+        return ev, ev_type, False
 
-        # port attr changed
-        elif event_id == self.EVENT_PORT_ATTR_CHG:
+    def _on_port_released(self, data):
+        port_id = int(data["port_id"])
+        who = data["who"]
+        session_id = data["session_id"]
 
-            port_id = int(data["port_id"])
+        ev = "Port {0} was released by {1}".format(port_id, self.__event_user(session_id, who))
 
-            diff = self.__async_event_port_attr_changed(port_id, data["attr"])
-            if not diff:
-                return
+        # call the handler in case its not this session
+        if session_id != self.client.session_id:
+            self.__async_event_port_released(port_id)
+        return ev, "info", False
 
-            ev = "port {0} attributes changed".format(port_id)
-            for key, (old_val, new_val) in list(diff.items()):
-                ev += "\n  {key}: {old} -> {new}".format(
-                    key=key,
-                    old=old_val.lower() if type(old_val) is str else old_val,
-                    new=new_val.lower() if type(new_val) is str else new_val,
-                )
+    def _on_port_error(self, data):
+        return "port {0} job failed".format(int(data["port_id"])), "warning", False
 
-            ev_type = "info"
-            show_event = False
+    def _on_port_attr_changed(self, data):
+        port_id = int(data["port_id"])
 
-        # server stopped
-        elif event_id == self.EVENT_SERVER_STOPPED:
-            ev = "Server has been shutdown - cause: '{0}'".format(data["cause"])
-            self.__async_event_server_stopped(ev)
-            ev_type = "warning"
+        diff = self.__async_event_port_attr_changed(port_id, data["attr"])
+        if not diff:
+            return None
 
-        else:
-            # unknown event - ignore
-            return
+        ev = "port {0} attributes changed".format(port_id)
+        for key, (old_val, new_val) in diff.items():
+            ev += "\n  {key}: {old} -> {new}".format(
+                key=key,
+                old=old_val.lower() if type(old_val) is str else old_val,
+                new=new_val.lower() if type(new_val) is str else new_val,
+            )
+        return ev, "info", False
 
-        # showed events(port job done,
-        self.__add_event_log("server", ev_type, ev, show_event)
+    def _on_server_stopped(self, data):
+        ev = "Server has been shutdown - cause: '{0}'".format(data["cause"])
+        self.__async_event_server_stopped(ev)
+        return ev, "warning", False
 
     # private functions
 
+    # format the thief/us...
+    def __event_user(self, session_id, who):
+        if session_id == self.client.session_id:
+            return "you"
+        elif who == self.client.username:
+            return "another session of you"
+        else:
+            return "'{0}'".format(who)
+
     # on rare cases events may come on a non existent prot
     # (server was re-run with different config)
 
@@ -1,7 +1,6 @@
 #!/usr/bin/python3
 
 import datetime
-import json
 import os
 import random
 import re
@@ -14,6 +13,7 @@ import zmq
 from .. import TrexError
 from ..text_opts import format_num
 from ..zipmsg import ZippedMsg
+from . import json_loads
 
 
 # basic async stats class
@@ -262,8 +262,6 @@ class CTRexAsyncClient:
                 if unzipped:
                     line = unzipped
 
-                line = line.decode()
-
                 # signal once
                 if not got_data:
                     self.event_handler.on_async_alive()
@@ -283,7 +281,7 @@ class CTRexAsyncClient:
                 assert self.t_state != self.THREAD_STATE_ACTIVE
                 break
 
-            msg = json.loads(line)
+            msg = json_loads(line)
             name = msg["name"]
             data = msg["data"]
             type = msg["type"]
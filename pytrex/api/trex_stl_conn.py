@@ -44,17 +44,17 @@ class CCommLink(object):
         if self.virtual:
             self._prompt_virtual_tx_msg()
             _, msg = self.rpc_link.create_jsonrpc_v2(method_name, params, api_class)
-            print(msg)
+            print(msg.decode())
             return
         else:
             return self.rpc_link.invoke_rpc_method(method_name, params, api_class, retry=retry)
 
-    def transmit_batch(self, batch_list, retry=0):
+    def transmit_batch(self, batch_list, retry=0, check=True):
         if self.virtual:
             self._prompt_virtual_tx_msg()
             print(
                 [
-                    msg
+                    msg.decode()
                     for _, msg in [
                         self.rpc_link.create_jsonrpc_v2(command.method, command.params, command.api_class)
                         for command in batch_list
@@ -66,7 +66,7 @@ class CCommLink(object):
             for command in batch_list:
                 batch.add(command.method, command.params, command.api_class)
             # invoke the batch
-            return batch.invoke(retry=retry)
+            return batch.invoke(retry=retry, check=check)
 
     def _prompt_virtual_tx_msg(self):
         print(("Transmitting virtually over tcp://{server}:{port}".format(server=self.server, port=self.port)))
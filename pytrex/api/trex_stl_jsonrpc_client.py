@@ -1,11 +1,15 @@
-import json
+import itertools
+import logging
 from threading import Lock
 
 import zmq
 
 from .. import TrexError
-from ..common import random_id_gen
 from ..zipmsg import ZippedMsg
+from . import json_dumps, json_loads, json_pretty
+
+# send/receive timeout of a single RPC attempt.
+RPC_TIMEOUT_MS = 10000
 
 
 # sub class to describe a batch
@@ -15,34 +19,31 @@ class BatchMessage:
         self.batch_list = []
 
     def add(self, method_name, params=None, api_class="core"):
-
-        id, msg = self.rpc_client.create_jsonrpc_v2(method_name, params, api_class, encode=False)
+        # messages are encoded once, when added, and invoke only concatenates them
+        id, msg = self.rpc_client.create_jsonrpc_v2(method_name, params, api_class)
         self.batch_list.append(msg)
 
-    def invoke(self, chunk_size=500000, retry=0) -> list:
+    def invoke(self, chunk_size=500000, retry=0, check=True) -> list:
         if not self.rpc_client.connected:
             raise TrexError("Not connected to server")
 
-        if chunk_size:
-            response_batch = []
-            size = 0
-            new_batch = []
-            for msg in self.batch_list:
-                size += len(json.dumps(msg))
-                new_batch.append(msg)
-
-                if size > chunk_size:
-                    batch_json = json.dumps(new_batch)
-                    response_batch += self.rpc_client.send_msg(batch_json)
-                    size = 0
-                    new_batch = []
-            if new_batch:
-                batch_json = json.dumps(new_batch)
-                response_batch = self.rpc_client.send_msg(batch_json)
-            return response_batch
-        else:
-            batch_json = json.dumps(self.batch_list)
-            return self.rpc_client.send_msg(batch_json, retry=retry)
+        if not chunk_size:
+            return self.rpc_client.send_msg(b"[" + b",".join(self.batch_list) + b"]", retry=retry, check=check)
+
+        response_batch = []
+        batch_json = bytearray(b"[")
+        for msg in self.batch_list:
+            if len(batch_json) > 1:
+                batch_json += b","
+            batch_json += msg
+            if len(batch_json) > chunk_size:
+                batch_json += b"]"
+                response_batch += self.rpc_client.send_msg(batch_json, retry=retry, check=check)
+                batch_json = bytearray(b"[")
+        if len(batch_json) > 1:
+            batch_json += b"]"
+            response_batch += self.rpc_client.send_msg(batch_json, retry=retry, check=check)
+        return response_batch
 
 
 # JSON RPC v2.0 client
@@ -56,7 +57,7 @@ class JsonRpcClient:
         self.port = default_port
         self.server = default_server
 
-        self.id_gen = random_id_gen()
+        self.id_gen = itertools.count(1)
         self.zipper = ZippedMsg()
 
         self.lock = Lock()
@@ -74,21 +75,18 @@ class JsonRpcClient:
         return BatchMessage(self)
 
     def create_jsonrpc_v2(self, method_name, params=None, api_class="core", encode=True):
-        msg = {}
-        msg["jsonrpc"] = "2.0"
-        msg["method"] = method_name
-        msg["id"] = next(self.id_gen)
-        msg["params"] = params if params is not None else {}
+        msg_id = next(self.id_gen)
+        params = params if params is not None else {}
 
-        # if this RPC has an API class - add it's handler
+        # if this RPC has an API class - add it's handler, without changing the caller's params
         if api_class:
-            msg["params"]["api_h"] = self.get_api_h()[api_class]
+            params = {**params, "api_h": self.get_api_h()[api_class]}
 
-        # pdb.set_trace()
+        msg = {"jsonrpc": "2.0", "method": method_name, "id": msg_id, "params": params}
         if encode:
-            return id, json.dumps(msg)
+            return msg_id, json_dumps(msg)
         else:
-            return id, msg
+            return msg_id, msg
 
     def invoke_rpc_method(self, method_name, params=None, api_class="core", retry=0):
         if not self.connected:
@@ -98,19 +96,22 @@ class JsonRpcClient:
 
         return self.send_msg(msg, retry=retry)
 
-    def send_msg(self, msg, retry=0):
+    def send_msg(self, msg, retry=0, check=True):
         # REQ/RESP pattern in ZMQ requires no interrupts during the send
         with self.lock:
-            rc = self.__send_msg(msg, retry)
+            rc = self.__send_msg(msg, retry, check)
         return rc
 
-    def __send_msg(self, msg, retry=0):
+    def __send_msg(self, msg, retry=0, check=True):
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+
         # print before
-        pretty_json = json.dumps(json.loads(msg), indent=4, separators=(",", ": "), sort_keys=True)
-        self.logger.debug(f"Sending Request To Server:\n{pretty_json}\n")
+        if debug:
+            pretty_json = json_pretty(json_loads(msg))
+            self.logger.debug(f"Sending Request To Server:\n{pretty_json}\n")
 
-        # encode string to buffer
-        buffer = msg.encode("utf-8", "ignore")
+        # messages are already encoded
+        buffer = msg
 
         if self.zipper.check_threshold(buffer):
             response = self.send_raw_msg(self.zipper.compress(buffer), retry=retry)
@@ -122,22 +123,22 @@ class JsonRpcClient:
         elif self.zipper.is_compressed(response):
             response = self.zipper.decompress(response)
 
-        # return to string
-        response = response.decode()
-
-        # print after
-        pretty_json = json.dumps(json.loads(response), indent=4, separators=(",", ": "), sort_keys=True)
-        self.logger.debug(f"Server Response:\n{pretty_json}\n")
-
         # process response(batch and regular)
         try:
-            response_json = json.loads(response)
+            response_json = json_loads(response)
         except (TypeError, ValueError):
             raise TrexError("*** [RPC] - Failed to decode response from server")
 
-        response_list = response_json if isinstance(response_json, list) else [response_json]
-        for response in response_list:
-            self.check_response(response)
+        # print after
+        if debug:
+            pretty_json = json_pretty(response_json)
+            self.logger.debug(f"Server Response:\n{pretty_json}\n")
+
+        # unchecked responses are checked by the caller, one by one
+        if check:
+            response_list = response_json if isinstance(response_json, list) else [response_json]
+            for response in response_list:
+                self.check_response(response)
 
         return response_json
 
@@ -160,8 +161,9 @@ class JsonRpcClient:
                 if isinstance(msg, str):
                     msg = msg  # .encode("utf-8", "ignore")
 
-                if isinstance(msg, bytes):
-                    self.socket.send(msg)
+                if isinstance(msg, (bytes, bytearray)):
+                    # messages are not modified after send so zmq can use them without copy
+                    self.socket.send(msg, copy=False)
                 else:
                     raise TrexError("*** [RPC] - failed to understand message to server")
                 break
@@ -171,18 +173,13 @@ class JsonRpcClient:
                     self.disconnect()
                     raise TrexError("*** [RPC] - Failed to send message to server")
 
-        retry_left = retry
-        while True:
-            try:
-                response = self.socket.recv()
-                break
-            except zmq.Again:
-                retry_left -= 1
-                if retry_left < 0:
-                    self.disconnect()
-                    raise TrexError(f"*** [RPC] - Failed to get server response from {self.transport}")
-
-        return response
+        # wait for the response on the poller instead of blocking in recv, each retry waits a full timeout period
+        for _ in range(retry + 1):
+            if self.poller.poll(RPC_TIMEOUT_MS):
+                # response buffer is used as is by the decoder, without copy to bytes
+                return self.socket.recv(copy=False).buffer
+        self.disconnect()
+        raise TrexError(f"*** [RPC] - Failed to get server response from {self.transport}")
 
     @staticmethod
     def check_response(response: dict) -> None:
@@ -220,10 +217,16 @@ class JsonRpcClient:
         self.transport = "tcp://{0}:{1}".format(self.server, self.port)
 
         self.socket = self.context.socket(zmq.REQ)
+        # the same socket is used for the whole session (zmq already disables Nagle), keep it alive when idle between tests
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE_IDLE, 60)
         self.socket.connect(self.transport)
 
-        self.socket.setsockopt(zmq.SNDTIMEO, 10000)
-        self.socket.setsockopt(zmq.RCVTIMEO, 10000)
+        self.socket.setsockopt(zmq.SNDTIMEO, RPC_TIMEOUT_MS)
+        self.socket.setsockopt(zmq.RCVTIMEO, RPC_TIMEOUT_MS)
+
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
 
         self.connected = True
 
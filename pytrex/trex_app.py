@@ -7,9 +7,13 @@ import time
 from typing import Dict, List, Optional
 
 from trafficgenerator import ApiType, TgnApp
+from trafficgenerator.tgn_object import TgnSubStatsDict
 
+from pytrex import TrexError
+from pytrex.api import RpcCmdData
 from pytrex.api.trex_event import EventsHandler
 from pytrex.api.trex_stl_conn import Connection
+from pytrex.api.trex_stl_jsonrpc_client import JsonRpcClient
 from pytrex.trex_object import TrexObject
 from pytrex.trex_port import TrexCaptureMode, TrexPort
 from pytrex.trex_statistics_view import TrexStreamStatistics
@@ -53,10 +57,20 @@ class TrexServer(TrexObject):
         self.virtual = virtual
         self.server = self
         self.event_handler: EventsHandler = None
+        self._stream_stats_view: Optional[TrexStreamStatistics] = None
+        self._system_info: Optional[dict] = None
+        self._supported_cmds: Optional[dict] = None
+        self._ports: Optional[Dict[int, TrexPort]] = None
         super().__init__(parent=None, objType="server", objRef="server")
 
     def connect(self) -> None:
-        """Connect to the TRex server."""
+        """Connect to the TRex server.
+
+        The RPC connection is persistent, keep using the connected server for all operations instead of reconnecting.
+        """
+        self._system_info = None
+        self._supported_cmds = None
+        self._stream_stats_view = None
         self.event_handler = EventsHandler(self)
         connection_info = {
             "username": self.username,
@@ -71,9 +85,14 @@ class TrexServer(TrexObject):
 
     def disconnect(self) -> None:
         """Release all ports and disconnect from server."""
-        for port in self.ports.values():
-            port.release()
+        ports = self.ports.values()
+        self.transmit_batch([port.release_cmd() for port in ports])
+        for port in ports:
+            port.on_released()
         self.api.disconnect()
+        self._system_info = None
+        self._supported_cmds = None
+        self._stream_stats_view = None
 
     def reserve_ports(self, locations: list[int], force: bool = False, reset: bool = False) -> dict[int, TrexPort]:
         """Reserve ports.
@@ -85,8 +104,26 @@ class TrexServer(TrexObject):
         :param reset: True - reset port, False - leave port configuration
         :return: ports dictionary (location: object)
         """
-        for location in locations:
-            TrexPort(server=self, index=location).reserve(force, reset)
+        ports = [TrexPort(server=self, index=location) for location in locations]
+        errors = []
+        try:
+            responses = self.transmit_batch([port.acquire_cmd(force) for port in ports], check=False)
+            # ports acquired successfully keep their handlers even if other ports failed, so they can be released
+            for location, port, rc in zip(locations, ports, responses):
+                try:
+                    JsonRpcClient.check_response(rc)
+                except TrexError as error:
+                    errors.append(f"port {location}: {error}")
+                else:
+                    port.set_handler(rc["result"])
+        finally:
+            # port IDs are derived from the handlers, so the ports dictionary is rebuilt even if acquire failed
+            self.invalidate_ports()
+        if errors:
+            raise TrexError(f"Failed to reserve ports - {', '.join(errors)}")
+        if reset:
+            for port in ports:
+                port.reset()
         return self.ports
 
     #
@@ -94,12 +131,49 @@ class TrexServer(TrexObject):
     #
 
     def get_system_info(self) -> dict:
-        """Get system information from server."""
-        return self.transmit("get_system_info", {})["result"]
+        """Get system information from server, read once per connection."""
+        if self._system_info is None:
+            self._system_info = self.transmit("get_system_info", {})["result"]
+        return self._system_info
 
     def get_supported_cmds(self) -> dict:
-        """Get supported commands from server."""
-        return self.transmit("get_supported_cmds", {})["result"]
+        """Get supported commands from server, read once per connection."""
+        if self._supported_cmds is None:
+            self._supported_cmds = self.transmit("get_supported_cmds", {})["result"]
+        return self._supported_cmds
+
+    def get_stream_statistics(self) -> TrexStreamStatistics:
+        """Get stream statistics view, created once until streams are written or removed, or ports are reserved."""
+        if self._stream_stats_view is None:
+            self._stream_stats_view = TrexStreamStatistics(self)
+        return self._stream_stats_view
+
+    def invalidate_stream_statistics(self) -> None:
+        """Drop the stream statistics view, called when active pgids and stream IDs change."""
+        self._stream_stats_view = None
+
+    def invalidate_ports(self) -> None:
+        """Drop the ports dictionary and the stream statistics view, called when ports are created, reserved or deleted."""
+        self._ports = None
+        self._stream_stats_view = None
+
+    def del_objects_by_type(self, type_: str) -> None:
+        """Delete all children of the requested type, and drop the ports dictionary.
+
+        :param type_: type of the children to delete.
+        """
+        super().del_objects_by_type(type_)
+        self.invalidate_ports()
+
+    def write_streams(self, *ports: TrexPort) -> None:
+        """Write all streams of list of ports to server in a single batch.
+
+        :param ports: list of ports to write streams to, if empty, write to all ports.
+        """
+        ports = ports or tuple(self.ports.values())
+        self.transmit_batch([cmd for port in ports for cmd in port.write_streams_cmds()])
+        for port in ports:
+            port.on_streams_written()
 
     #
     # Control
@@ -108,11 +182,59 @@ class TrexServer(TrexObject):
     def clear_stats(self, *ports: TrexPort) -> None:
         """Clear statistics on list of ports.
 
+        Base counters of all ports and of the active pgids of the ports streams are read in a single batch.
+
         :param ports: list of ports to start traffic on, if empty, clear all ports.
         """
-        for port in ports or self.ports.values():
-            port.clear_stats()
-        TrexStreamStatistics.clear_stats(self)
+        ports_cmds = {port: port.clear_stats_cmds() for port in ports or self.ports.values()}
+        pgids = self.get_stream_statistics().ids
+        batch = [cmd for port_cmds in ports_cmds.values() for cmd in port_cmds]
+        if pgids:
+            batch.append(RpcCmdData("get_pgid_stats", {"pgids": pgids}, "core"))
+        responses = iter(self.transmit_batch(batch))
+        for port, port_cmds in ports_cmds.items():
+            port.set_base_stats(*(next(responses)["result"] for _ in port_cmds))
+        TrexStreamStatistics.base_pgid_stats = next(responses)["result"]["flow_stats"] if pgids else {}
+
+    def read_stats(self, *ports: TrexPort) -> TgnSubStatsDict:
+        """Read statistics of list of ports in a single batch.
+
+        :param ports: list of ports to read statistics from, if empty, read all ports.
+        :return: {port: statistics}
+        """
+        ports = ports or tuple(self.ports.values())
+        responses = self.transmit_batch([port.rpc_cmd("get_port_stats") for port in ports])
+        return TgnSubStatsDict({port: port.set_stats(rc["result"]) for port, rc in zip(ports, responses)})
+
+    def read_all_stats(self, *ports: TrexPort) -> TgnSubStatsDict:
+        """Read statistics and extended statistics of list of ports in a single batch.
+
+        :param ports: list of ports to read statistics from, if empty, read all ports.
+        :return: {port: statistics}
+        """
+        ports_cmds = {port: port.read_all_stats_cmds() for port in ports or self.ports.values()}
+        responses = iter(self.transmit_batch([cmd for port_cmds in ports_cmds.values() for cmd in port_cmds]))
+        return TgnSubStatsDict(
+            {
+                port: port.set_all_stats(*(next(responses)["result"] for _ in port_cmds))
+                for port, port_cmds in ports_cmds.items()
+            }
+        )
+
+    def read_ports_and_streams_stats(self) -> Dict[str, TgnSubStatsDict]:
+        """Read ports and streams statistics in a single batch.
+
+        :return: {'ports': {port: statistics}, 'streams': {stream: statistics}}
+        """
+        ports = list(self.ports.values())
+        stream_stats_view = self.get_stream_statistics()
+        batch = [port.rpc_cmd("get_port_stats") for port in ports]
+        if stream_stats_view.ids:
+            batch.append(RpcCmdData("get_pgid_stats", {"pgids": stream_stats_view.ids}, "core"))
+        responses = self.transmit_batch(batch)
+        ports_stats = TgnSubStatsDict({port: port.set_stats(rc["result"]) for port, rc in zip(ports, responses)})
+        pgid_stats = responses[-1]["result"]["flow_stats"] if stream_stats_view.ids else {}
+        return {"ports": ports_stats, "streams": stream_stats_view.set_stats(pgid_stats)}
 
     def start_transmit(self, blocking: bool = False, *ports: TrexPort) -> None:
         """Start traffic on list of ports.
@@ -142,8 +264,9 @@ class TrexServer(TrexObject):
             start_at_ts = 0
 
         for port in ports:
+            port.validate_has_streams()
             port.start_at_ts = start_at_ts
-            port.start_transmit(blocking=False)
+        self.transmit_batch([port.start_traffic_cmd() for port in ports])
 
         if blocking:
             self.wait_transmit(*ports)
@@ -156,14 +279,17 @@ class TrexServer(TrexObject):
         for port in ports or self.ports.values():
             port.stop_transmit()
 
-    def wait_transmit(self, *ports: TrexPort) -> None:
-        """Wait for transmit end on list of ports.
+    def wait_transmit(self, *ports: TrexPort, min_wait: float = 1, timeout: float = 4, interval: float = 0.5) -> None:
+        """Wait for transmit end on list of ports, then for packets counters to settle.
 
         :param ports: list of ports to wait for, if empty, wait for all ports.
+        :param min_wait: minimum time to wait for counters to settle in seconds, before the first read.
+        :param timeout: maximum time to wait for counters to settle in seconds.
+        :param interval: time between counters reads in seconds.
         """
         for port in ports or self.ports.values():
             port.wait_transmit()
-        time.sleep(4)
+        self._wait_stats_stable(min_wait, timeout, interval)
 
     def clear_capture(self, *ports: TrexPort) -> None:
         """Clear all existing capture IDs on list ports.
@@ -214,12 +340,34 @@ class TrexServer(TrexObject):
 
     @property
     def ports(self) -> dict[int, TrexPort]:
-        """Return dictionary {index: TrexPort} of all ports."""
-        return {p.id: p for p in self.get_objects_by_type("port")}
+        """Return dictionary {index: TrexPort} of all ports, rebuilt only after ports are created, reserved or deleted."""
+        if self._ports is None:
+            self._ports = {p.id: p for p in self.get_objects_by_type("port")}
+        return self._ports
 
     #
     # Private
     #
 
+    def _wait_stats_stable(self, min_wait: float, timeout: float, interval: float) -> None:
+        """Wait at least min_wait, then until packets counters of all ports do not change between two reads, or until timeout.
+
+        Counters may not change between two reads while packets are still in flight, so the first read is after min_wait.
+
+        :param min_wait: minimum time to wait in seconds.
+        :param timeout: maximum time to wait in seconds.
+        :param interval: time between reads in seconds.
+        """
+        batch = [port.rpc_cmd("get_port_stats") for port in self.ports.values()]
+        deadline = time.monotonic() + max(timeout, min_wait)
+        time.sleep(min_wait)
+        last_counters = None
+        while True:
+            counters = [(rc["result"]["opackets"], rc["result"]["ipackets"]) for rc in self.transmit_batch(batch)]
+            if counters == last_counters or time.monotonic() >= deadline:
+                return
+            last_counters = counters
+            time.sleep(interval)
+
     def _get_api_h(self):
         return self.api.get_api_h()
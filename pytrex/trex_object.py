@@ -28,8 +28,8 @@ class TrexObject(TgnObject):
         """
         return self.api.rpc.transmit(method_name, params, "core")
 
-    def transmit_batch(self, batch_list):
-        return self.api.rpc.transmit_batch(batch_list)
+    def transmit_batch(self, batch_list, check: bool = True):
+        return self.api.rpc.transmit_batch(batch_list, check=check)
 
     def get_name(self) -> str:
         pass
@@ -2,11 +2,10 @@
 Classes and utilities that represents TRex port.
 """
 import re
-import time
-from copy import deepcopy
+import threading
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional
 
 from trafficgenerator import TgnError
 
@@ -17,40 +16,25 @@ from pytrex.trex_stream import TrexStream, TrexYamlLoader
 
 MASK_ALL = (1 << 64) - 1
 
+_FACTOR = {None: 1, "k": 1_000, "m": 1_000_000, "g": 1_000_000_000}
 
-def decode_multiplier(val, allow_update=False, divide_count=1):
-    factor_table = {None: 1, "k": 1e3, "m": 1e6, "g": 1e9}
-    pattern = r"^(\d+(\.\d+)?)(((k|m|g)?(bpsl1|pps|bps))|%)?"
-
-    # do we allow updates ?  +/-
-    if not allow_update:
-        pattern += "$"
-        match = re.match(pattern, val)
-        op = None
-    else:
-        pattern += r"([\+\-])?$"
-        match = re.match(pattern, val)
-        if match:
-            op = match.group(7)
-        else:
-            op = None
+_MULTIPLIER_PATTERN = re.compile(
+    r"^(?P<value>\d+(?:\.\d+)?)(?P<unit>(?P<factor>[kmg])?(?P<m_type>bpsl1|pps|bps)|%)?(?P<op>[+\-])?$"
+)
 
-    result = {}
 
+def decode_multiplier(val, allow_update=False, divide_count=1):
+    match = _MULTIPLIER_PATTERN.match(val)
     if not match:
         return None
+    value, unit, factor, m_type, op = match.group("value", "unit", "factor", "m_type", "op")
 
-    # value in group 1
-    value = float(match.group(1))
-
-    # decode unit as whole
-    unit = match.group(3)
-
-    # k,m,g
-    factor = match.group(5)
+    # do we allow updates ?  +/-
+    if op and not allow_update:
+        return None
 
-    # type of multiplier
-    m_type = match.group(6)
+    result = {}
+    value = float(value)
 
     # raw type(factor)
     if not unit:
@@ -62,17 +46,10 @@ def decode_multiplier(val, allow_update=False, divide_count=1):
         result["type"] = "percentage"
         result["value"] = value
 
-    elif m_type == "bps":
-        result["type"] = "bps"
-        result["value"] = value * factor_table[factor]
-
-    elif m_type == "pps":
-        result["type"] = "pps"
-        result["value"] = value * factor_table[factor]
-
-    elif m_type == "bpsl1":
-        result["type"] = "bpsl1"
-        result["value"] = value * factor_table[factor]
+    # bps, pps, bpsl1
+    else:
+        result["type"] = m_type
+        result["value"] = value * _FACTOR[factor]
 
     if op == "+":
         result["op"] = "add"
@@ -81,7 +58,8 @@ def decode_multiplier(val, allow_update=False, divide_count=1):
     else:
         result["op"] = "abs"
 
-    if result["op"] != "percentage":
+    # percentage is relative to each port line rate, so it is not divided between the ports
+    if result["type"] != "percentage" and divide_count != 1:
         result["value"] = result["value"] / divide_count
 
     return result
@@ -108,6 +86,7 @@ class TrexPort(TrexObject):
         :param index: Port index, zero based
         """
         super().__init__(parent=server, objType="port", index=str(index))
+        self._port_id = int(index)
         self.mul = decode_multiplier("1", allow_update=False, divide_count=1)
         self.duration = -1
         self.force = False
@@ -118,6 +97,14 @@ class TrexPort(TrexObject):
         self.base_stats: dict = None
         self.statistics: dict = None
         self.xstatistics: dict = None
+        self._counter_keys: tuple = ()
+        self._promisc: Optional[bool] = None
+        self._streams: Optional[Dict[str, TrexStream]] = None
+        # whether the port has streams on the server, None - unknown (port was not reset or written)
+        self._has_streams: Optional[bool] = None
+        self._base_params: Dict = {}
+        self._abort = threading.Event()
+        server.invalidate_ports()
 
     def reserve(self, force: Optional[bool] = False, reset: Optional[bool] = False) -> None:
         """Reserve port.
@@ -128,8 +115,10 @@ class TrexPort(TrexObject):
         :param force: True - take forcefully, False - fail if port is reserved by other user
         :param reset: True - reset port, False - leave port configuration
         """
-        params = {"port_id": int(self.index), "user": self.username, "session_id": self.session_id, "force": force}
-        self._data["objRef"] = self.api.rpc.transmit("acquire", params)["result"]
+        try:
+            self.set_handler(self.transmit("acquire", self.acquire_cmd(force).params)["result"])
+        finally:
+            self.server.invalidate_ports()
         if reset:
             self.reset()
 
@@ -139,6 +128,15 @@ class TrexPort(TrexObject):
         TRex -> Port -> Release Acquire.
         """
         self.transmit("release")
+        self.on_released()
+
+    def release_cmd(self) -> RpcCmdData:
+        """Create release RPC command for batch transmit."""
+        return self.rpc_cmd("release")
+
+    def on_released(self) -> None:
+        """Forget port attributes cached while the port was reserved."""
+        self._promisc = None
 
     def reset(self) -> None:
         self.stop_transmit()
@@ -159,8 +157,11 @@ class TrexPort(TrexObject):
         self.transmit("service", params)
 
     def set_promiscuous_mode(self, enabled):
+        if enabled == self._promisc:
+            return
         params = {"session_id": self.session_id, "attr": {"promiscuous": {"enabled": enabled}}}
         self.transmit("set_port_attr", params)
+        self._promisc = enabled
 
     #
     # Streams.
@@ -168,14 +169,32 @@ class TrexPort(TrexObject):
 
     def remove_all_streams(self) -> None:
         self.del_objects_by_type("stream")
+        self._streams = {}
         self.transmit("remove_all_streams")
+        self._has_streams = False
+        self.server.invalidate_stream_statistics()
 
     def add_stream(self, name: str) -> TrexStream:
         """Add stream with default configuration.
 
         :param name: unique stream name
         """
-        return TrexStream(self, index=len(self.streams), name=name)
+        stream = TrexStream(self, index=len(self.streams), name=name)
+        self.streams[name] = stream
+        return stream
+
+    def add_streams(self, names: List[Optional[str]]) -> List[TrexStream]:
+        """Add streams with default configuration.
+
+        :param names: unique stream names, None for default name.
+        """
+        first_index = len(self.streams)
+        streams = [
+            TrexStream(self, index=index, name=name if name is not None else f"stream-{index}")
+            for index, name in enumerate(names, start=first_index)
+        ]
+        self.streams.update((stream.name, stream) for stream in streams)
+        return streams
 
     def load_streams(self, yaml_file: Path) -> None:
         """Load streams from YAML file.
@@ -192,21 +211,42 @@ class TrexPort(TrexObject):
         """
         raise NotImplementedError()
 
+    def dump_streams_json(self, buffer: BinaryIO) -> None:
+        """Write all streams as json list to binary file-like buffer, one stream at a time.
+
+        :param buffer: binary file-like object to write to.
+        """
+        buffer.write(b"[")
+        for index, stream in enumerate(self.streams.values()):
+            if index:
+                buffer.write(b",")
+            stream.dump_json(buffer)
+        buffer.write(b"]")
+
     def write_streams(self) -> None:
         """Write all streams to server."""
-        self.transmit("remove_all_streams")
-        batch = []
-        for name, stream in self.streams.items():
-            stream_fields = deepcopy(stream.fields)
-            stream_id = list(self.streams.keys()).index(name) + 1
+        self.transmit_batch(self.write_streams_cmds())
+        self.on_streams_written()
+
+    def write_streams_cmds(self) -> List[RpcCmdData]:
+        """Create RPC commands that replace the port streams on the server with the local streams."""
+        streams = self.streams
+        # stream IDs are 1 based positions of the streams on the port
+        stream_ids = {name: stream_id for stream_id, name in enumerate(streams, start=1)}
+        # batch commands are executed in order, so existing streams are removed before the new streams are added
+        batch = [self.rpc_cmd("remove_all_streams")]
+        for name, stream in streams.items():
+            stream_fields = stream.to_json()
             next_stream = stream_fields.pop("next_stream")
-            stream_fields["next_stream_id"] = list(self.streams.keys()).index(next_stream) + 1 if next_stream else -1
-
-            params = {"handler": self.ref, "port_id": self.id, "stream_id": stream_id, "stream": stream_fields}
-            cmd = RpcCmdData("add_stream", params, "core")
-            batch.append(cmd)
+            stream_fields["next_stream_id"] = stream_ids[next_stream] if next_stream else -1
+            batch.append(self.rpc_cmd("add_stream", {"stream_id": stream_ids[name], "stream": stream_fields}))
+        return batch
 
-        self.api.rpc.transmit_batch(batch)
+    def on_streams_written(self) -> None:
+        """Update port state after write_streams_cmds were transmitted."""
+        self._has_streams = bool(self.streams)
+        # active pgids and stream ids changed
+        self.server.invalidate_stream_statistics()
 
     #
     # Control.
@@ -227,9 +267,20 @@ class TrexPort(TrexObject):
         :param blocking: if blockeing - wait for transmit end, else - return after transmit starts.
         :return:
         """
-        if self.get_port_state() == PortState.IDLE:
+        self.validate_has_streams()
+        self.transmit_batch([self.start_traffic_cmd()])
+
+        if blocking:
+            self.wait_transmit()
+
+    def validate_has_streams(self) -> None:
+        """Raise TgnError if the port has no streams on the server."""
+        has_streams = self._has_streams if self._has_streams is not None else self.get_port_state() != PortState.IDLE
+        if not has_streams:
             raise TgnError("unable to start traffic - no streams attached to port")
 
+    def start_traffic_cmd(self) -> RpcCmdData:
+        """Create start traffic RPC command for batch transmit."""
         params = {
             "mul": self.mul,
             "duration": self.duration,
@@ -237,20 +288,26 @@ class TrexPort(TrexObject):
             "core_mask": self.mask,
             "start_at_ts": self.start_at_ts,
         }
-        self.transmit("start_traffic", params)
-
-        if blocking:
-            self.wait_transmit()
+        return self.rpc_cmd("start_traffic", params)
 
     def stop_transmit(self) -> None:
         """Stop transmit."""
         self.transmit("stop_traffic")
         self.wait_transmit()
 
-    def wait_transmit(self) -> None:
-        """Wait until port finishes transmition."""
+    def wait_transmit(self, delay: float = 1) -> None:
+        """Wait until port finishes transmition or until wait is aborted.
+
+        :param delay: seconds to wait between port state polls.
+        """
+        self._abort.clear()
         while self.is_transmitting():
-            time.sleep(1)
+            if self._abort.wait(delay):
+                break
+
+    def abort_wait(self) -> None:
+        """Abort current wait_transmit, can be called from any thread."""
+        self._abort.set()
 
     #
     # Statistics.
@@ -258,25 +315,60 @@ class TrexPort(TrexObject):
 
     def clear_stats(self) -> None:
         """Get base counters values so read stats can subtract them from current counters values."""
-        values = self.transmit("get_port_xstats_values")["result"]
-        self.stat_names = self.transmit("get_port_xstats_names")["result"]
-        self.base_xstats = dict(zip(self.stat_names["xstats_names"], values["xstats_values"]))
-        self.base_stats = self.transmit("get_port_stats")["result"]
-        self.statistics = self.base_stats
-        self.xstatistics = self.base_xstats
+        self.set_base_stats(*(rc["result"] for rc in self.transmit_batch(self.clear_stats_cmds())))
 
     def read_stats(self) -> dict:
         """Read current counters values and adjust them based on base counters read before the test."""
-        self.statistics = self.transmit("get_port_stats")["result"]
-        for stat, value in self.statistics.items():
-            if not stat.endswith("ps"):
-                value -= self.base_stats[stat]
-            self.statistics[stat] = value
-        return self.statistics
+        return self.set_stats(self.transmit("get_port_stats")["result"])
 
     def read_xstats(self) -> dict:
         """Read current extended counters values and adjust them based on base counters read before the test."""
-        values = self.transmit("get_port_xstats_values")["result"]
+        return self.set_xstats(self.transmit("get_port_xstats_values")["result"])
+
+    def read_all_stats(self) -> dict:
+        """Read current counters and extended counters values in a single batch.
+
+        Extended counter names are taken from clear_stats, so they are not read again.
+        """
+        return self.set_all_stats(*(rc["result"] for rc in self.transmit_batch(self.read_all_stats_cmds())))
+
+    def clear_stats_cmds(self) -> List[RpcCmdData]:
+        """Create RPC commands that read base counters, responses are passed to set_base_stats."""
+        return [
+            self.rpc_cmd("get_port_xstats_values"),
+            self.rpc_cmd("get_port_xstats_names"),
+            self.rpc_cmd("get_port_stats"),
+        ]
+
+    def read_all_stats_cmds(self) -> List[RpcCmdData]:
+        """Create RPC commands that read counters and extended counters, responses are passed to set_all_stats."""
+        return [self.rpc_cmd("get_port_stats"), self.rpc_cmd("get_port_xstats_values")]
+
+    def set_all_stats(self, stats: dict, xstats_values: dict) -> dict:
+        """Set counters and extended counters read by read_all_stats_cmds."""
+        self.set_stats(stats)
+        self.set_xstats(xstats_values)
+        return self.statistics
+
+    def set_base_stats(self, xstats_values: dict, xstats_names: dict, stats: dict) -> None:
+        """Set base counters read by clear_stats_cmds."""
+        self.stat_names = xstats_names
+        self.base_xstats = dict(zip(self.stat_names["xstats_names"], xstats_values["xstats_values"]))
+        self.base_stats = stats
+        # Rate counters (*ps) are not accumulative so they are not adjusted by read_stats.
+        self._counter_keys = tuple(stat for stat in self.base_stats if not stat.endswith("ps"))
+        self.statistics = self.base_stats
+        self.xstatistics = self.base_xstats
+
+    def set_stats(self, stats: dict) -> dict:
+        """Set counters read from server, adjusted by the base counters."""
+        for stat in self._counter_keys:
+            stats[stat] -= self.base_stats[stat]
+        self.statistics = stats
+        return self.statistics
+
+    def set_xstats(self, values: dict) -> dict:
+        """Set extended counters read from server, adjusted by the base counters."""
         self.xstatistics = dict(zip(self.stat_names["xstats_names"], values["xstats_values"]))
         for stat, value in self.xstatistics.items():
             self.statistics[stat] = value - self.base_xstats[stat]
@@ -294,7 +386,8 @@ class TrexPort(TrexObject):
         """
         rc = self.transmit("capture", {"command": "status"})
         for capture in rc["result"]:
-            if rx and int(capture["filter"]["rx"]) - 1 == self.id or tx and int(capture["filter"]["tx"]) - 1 == self.id:
+            port_filter = capture["filter"]
+            if rx and int(port_filter["rx"]) - 1 == self._port_id or tx and int(port_filter["tx"]) - 1 == self._port_id:
                 params = {"command": "remove", "capture_id": capture["id"]}
                 self.transmit("capture", params=params)
 
@@ -337,10 +430,32 @@ class TrexPort(TrexObject):
         :param method_name: RPC command
         :param params: command parameters
         """
-        params = params if params else {}
-        params["port_id"] = self.id
-        params["handler"] = self.ref
-        return super().transmit(method_name, params)
+        return super().transmit(method_name, self._port_params(params))
+
+    def acquire_cmd(self, force: Optional[bool] = False) -> RpcCmdData:
+        """Create acquire RPC command, the port has no handler yet so it cannot use rpc_cmd.
+
+        :param force: True - take forcefully, False - fail if port is reserved by other user
+        """
+        params = {"port_id": self._port_id, "user": self.username, "session_id": self.session_id, "force": force}
+        return RpcCmdData("acquire", params, "core")
+
+    def set_handler(self, handler: str) -> None:
+        """Set the port handler returned by acquire, used in all subsequent port commands."""
+        self._data["objRef"] = handler
+        self._base_params = {"port_id": self._port_id, "handler": handler}
+
+    def rpc_cmd(self, method_name: str, params: Optional[Dict] = None) -> RpcCmdData:
+        """Create port RPC command for batch transmit.
+
+        :param method_name: RPC command
+        :param params: command parameters
+        """
+        return RpcCmdData(method_name, self._port_params(params), "core")
+
+    def _port_params(self, params: Optional[Dict]) -> Dict:
+        # caller params are not modified, the base params are shared as the RPC client does not modify params either
+        return {**params, **self._base_params} if params else self._base_params
 
     #
     # Properties.
@@ -348,7 +463,10 @@ class TrexPort(TrexObject):
 
     @property
     def streams(self) -> dict[str, TrexStream]:
-        return {s.name: s for s in self.get_objects_by_type("stream")}
+        """Return dictionary {name: TrexStream} of all port streams, kept up to date as streams are added or removed."""
+        if self._streams is None:
+            self._streams = {s.name: s for s in self.get_objects_by_type("stream")}
+        return self._streams
 
     @property
     def capture(self) -> TrexCapture:
@@ -2,12 +2,16 @@ from trafficgenerator.tgn_object import TgnSubStatsDict
 
 
 class TrexStatistics:
+    __slots__ = ("server", "statistics")
+
     def __init__(self, server) -> None:
         self.server = server
         self.statistics = TgnSubStatsDict()
 
 
 class TrexPortStatistics(TrexStatistics):
+    __slots__ = ()
+
     def read(self):
         self.statistics = TgnSubStatsDict()
         for port in self.server.ports.values():
@@ -16,45 +20,97 @@ class TrexPortStatistics(TrexStatistics):
 
 
 class TrexStreamStatistics(TrexStatistics):
+    """Per stream statistics.
+
+    Counters are stored as parallel tables - tx[stream][counter] and rx[stream][rx port][counter], indexed by streams,
+    ports, tx_names and rx_names. The nested statistics dictionary is built from the tables on first access.
+    """
+
+    __slots__ = (
+        "ids",
+        "stream_id_to_stream",
+        "streams",
+        "ports",
+        "tx_names",
+        "rx_names",
+        "tx",
+        "rx",
+        "_stream_index",
+        "_port_index",
+        "_statistics",
+    )
+
     def __init__(self, server) -> None:
         super().__init__(server)
         rc = self.server.api.rpc.transmit("get_active_pgids")
-        self.ids = rc["result"]["ids"]["flow_stats"]
-        self.stream_id_to_stream = {}
-        for port in server.ports.values():
-            for stream in port.streams.values():
-                stream_id = stream.fields["flow_stats"]["stream_id"]
-                self.stream_id_to_stream[stream_id] = stream
-
-    @classmethod
-    def clear_stats(cls, server):
-        """Get base counters values so read stats can subtract them from current counters values."""
-        rc = server.api.rpc.transmit("get_active_pgids")
-        ids = rc["result"]["ids"]["flow_stats"]
-        cls.base_pgid_stats = server.api.rpc.transmit("get_pgid_stats", params={"pgids": ids})["result"]["flow_stats"]
+        self.stream_id_to_stream = {
+            s.get_flow_stats_id(): s
+            for p in server.ports.values()
+            for s in p.streams.values()
+            if s.has_flow_stats()
+        }
+        # active pgids of streams this client did not write (other users, other sessions) are ignored
+        self.ids = [pgid for pgid in rc["result"]["ids"]["flow_stats"] if pgid in self.stream_id_to_stream]
+        self.streams = tuple(self.stream_id_to_stream[pgid] for pgid in self.ids)
+        self.ports = tuple(server.ports.values())
+        self.tx_names: tuple = ()
+        self.rx_names: tuple = ()
+        self.tx: list = []
+        self.rx: list = []
+        self._stream_index = {str(pgid): index for index, pgid in enumerate(self.ids)}
+        self._port_index = {str(port.id): index for index, port in enumerate(self.ports)}
+
+    @property
+    def statistics(self) -> TgnSubStatsDict:
+        """Return statistics as {stream: {'tx': {name: value}, 'rx': {port: {name: value}}}}."""
+        if self._statistics is None:
+            self._statistics = TgnSubStatsDict()
+            for stream, tx_row, rx_rows in zip(self.streams, self.tx, self.rx):
+                rx = {}
+                for port, rx_row in zip(self.ports, rx_rows):
+                    counters = {name: value for name, value in zip(self.rx_names, rx_row) if value}
+                    if counters:
+                        rx[port] = counters
+                self._statistics[stream] = {"tx": dict(zip(self.tx_names, tx_row)), "rx": rx}
+        return self._statistics
+
+    @statistics.setter
+    def statistics(self, statistics: TgnSubStatsDict) -> None:
+        self._statistics = statistics
 
     def read(self):
         """Read current counters values and adjust them based on base counters read before the test."""
         rc = self.server.api.rpc.transmit("get_pgid_stats", params={"pgids": self.ids})
-        pgid_stats = rc["result"]["flow_stats"]
-        self.statistics = TgnSubStatsDict()
+        return self.set_stats(rc["result"]["flow_stats"])
+
+    def set_stats(self, pgid_stats: dict) -> TgnSubStatsDict:
+        """Set counters from get_pgid_stats result, adjusted by the base counters."""
+        base_pgid_stats = getattr(self, "base_pgid_stats", None)
+        if not self.tx_names and pgid_stats:
+            names = next(iter(pgid_stats.values()))
+            self.tx_names = tuple(name for name in names if name.startswith("t"))
+            self.rx_names = tuple(name for name in names if not name.startswith("t"))
+        self.tx = [[0] * len(self.tx_names) for _ in self.streams]
+        self.rx = [[[0] * len(self.rx_names) for _ in self.ports] for _ in self.streams]
         for pgid, stats in pgid_stats.items():
-            stream = self.stream_id_to_stream[int(pgid)]
-            self.statistics[stream] = {"tx": {}, "rx": {}}
-            tx_port = stream.parent
-            for name, values in stats.items():
-                if name.startswith("t"):
-                    value = values[str(tx_port.id)]
-                    if not name.endswith("s") and hasattr(self, "base_pgid_stats"):
-                        value -= self.base_pgid_stats[pgid][name][str(tx_port.id)]
-                    self.statistics[stream]["tx"][name] = value
-                else:
-                    for rx_port, value in values.items():
-                        if not name.endswith("s") and hasattr(self, "base_pgid_stats"):
-                            value -= self.base_pgid_stats[pgid][name][str(tx_port.id)]
-                        if value:
-                            rx_port = self.server.ports[int(rx_port)]
-                            if rx_port not in self.statistics[stream]["rx"]:
-                                self.statistics[stream]["rx"][rx_port] = {}
-                            self.statistics[stream]["rx"][rx_port][name] = value
+            index = self._stream_index.get(pgid)
+            if index is None:
+                continue
+            tx_port_id = str(self.streams[index].parent.id)
+            base_stats = base_pgid_stats.get(pgid) if base_pgid_stats is not None else None
+            tx_row = self.tx[index]
+            for counter, name in enumerate(self.tx_names):
+                value = stats[name][tx_port_id]
+                if base_stats and not name.endswith("s"):
+                    value -= base_stats[name][tx_port_id]
+                tx_row[counter] = value
+            rx_rows = self.rx[index]
+            for counter, name in enumerate(self.rx_names):
+                for port_id, value in stats[name].items():
+                    if base_stats and not name.endswith("s"):
+                        value -= base_stats[name][tx_port_id]
+                    # packets received on ports this client did not reserve are ignored
+                    if value and port_id in self._port_index:
+                        rx_rows[self._port_index[port_id]][counter] = value
+        self._statistics = None
         return self.statistics
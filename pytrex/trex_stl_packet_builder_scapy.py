@@ -10,7 +10,7 @@ import struct
 import yaml
 from scapy.all import RawPcapReader, mac2str
 from scapy.layers.l2 import Ether
-from scapy.packet import NoPayload, Packet
+from scapy.packet import NoPayload
 from scapy.utils import hexdump, wrpcap
 
 
@@ -1584,16 +1584,12 @@ class STLPktBuilder:
     def is_default_src_mac(self) -> bool:
         if self.is_binary_source:
             return True
-        if isinstance(self.pkt, Packet) and isinstance(self.pkt, Ether) and "src" in self.pkt.fields:
-            return False
-        return True
+        return not (isinstance(self.pkt, Ether) and "src" in self.pkt.fields)
 
     def is_default_dst_mac(self):
         if self.is_binary_source:
             return True
-        if isinstance(self.pkt, Packet) and isinstance(self.pkt, Ether) and "dst" in self.pkt.fields:
-            return False
-        return True
+        return not (isinstance(self.pkt, Ether) and "dst" in self.pkt.fields)
 
     def compile(self):
         if self.pkt is None and self.pkt_raw is None:
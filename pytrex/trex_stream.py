@@ -1,24 +1,59 @@
 import base64
-import json
+import copy
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO
 
 import yaml
-from scapy.layers.inet import IP
-from scapy.layers.l2 import Ether
 
+from .api import json_dumps, json_pretty
 from .text_opts import format_num
 from .trex_object import TrexObject
-from .trex_statistics_view import TrexStreamStatistics
 from .trex_stl_packet_builder_scapy import STLPktBuilder
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+@lru_cache(maxsize=None)
+def _default_pkt_builder() -> STLPktBuilder:
+    """Return default packet builder, compiled once and shared by all streams without packet - it must not be modified."""
+    from scapy.layers.inet import IP
+    from scapy.layers.l2 import Ether
+
+    # default packet is serialized once, the builder parses the bytes instead of keeping scapy layers
+    builder = STLPktBuilder(pkt_buffer=bytes(Ether() / IP()))
+    builder.compile()
+    return builder
+
+
+@lru_cache(maxsize=32)
+def _load_profile(profile_path: str, mtime_ns: int) -> list:
+    """Load YAML profile, cached by path and modification time - the returned objects are shared and must not be modified."""
+    with open(profile_path, "r") as yaml_file:
+        return yaml.load(yaml_file, Loader=_YamlLoader)
+
+
+@lru_cache(maxsize=64)
+def _rate_desc(rate_type: str, rate_value: float) -> str:
+    """Return rate description, so rates shared by many streams are formatted once."""
+    suffix = _RATE_SUFFIX.get(rate_type)
+    if suffix is not None:
+        return format_num(rate_value, suffix=suffix)
+
+
+@lru_cache(maxsize=1024)
+def _pkt_layers_desc(pkt_buffer: bytes) -> str:
+    """Return packet layers description, so packets shared by many streams are dissected once."""
+    return STLPktBuilder.pkt_layers_desc_from_buffer(pkt_buffer)
+
 
 def del_fields(dict, *entries):
     for entry in entries:
-        try:
-            del dict[entry]
-        except Exception as _:
-            pass
+        dict.pop(entry, None)
 
 
 class TrexRateType(Enum):
@@ -34,6 +69,20 @@ class TrexTxType(Enum):
     multi_burst = 2
 
 
+_RATE_NAMES = {rate_type: rate_type.name for rate_type in TrexRateType}
+_TX_NAMES = {tx_type: tx_type.name for tx_type in TrexTxType}
+# server rate types, and the lower case names of TrexRateType used by the stream itself
+_RATE_SUFFIX = {
+    "pps": "pps",
+    "bps_L1": "bps(L1)",
+    "bps_L2": "bps(L2)",
+    "bps_l1": "bps(L1)",
+    "bps_l2": "bps(L2)",
+    "percentage": "%",
+}
+_FLOW_STATS_DISABLED = {"enabled": False}
+
+
 class TrexFlowStatsType(Enum):
     none = (0,)
     stats = (1,)
@@ -57,55 +106,56 @@ class TrexStream(TrexObject):
         self.reset_fields()
 
     def __repr__(self):
+        fields = self.to_json()
         s = "Stream Name: {0}\n".format(self.name)
-        s += "Stream Next: {0}\n".format(self.next)
-        s += "Stream JSON:\n{0}\n".format(json.dumps(self.fields, indent=4, separators=(",", ": "), sort_keys=True))
+        s += "Stream Next: {0}\n".format(self._fields["next_stream"])
+        s += "Stream JSON:\n{0}\n".format(json_pretty(fields, sort_keys=True))
         return s
 
     def reset_fields(self):
-        self.fields = {}
-        self.fields["enabled"] = True
-        self.fields["next_stream"] = None
-        self.fields["self_start"] = True
-        self.fields["action_count"] = 0
-        self.fields["isg"] = 0
-        self.fields["flags"] = 0x0
-        self.fields["mode"] = {}
-        self.fields["mode"]["rate"] = {}
-        self.fields["mode"]["rate"]["type"] = TrexRateType.pps.name
-        self.fields["mode"]["rate"]["value"] = 1
-        self.fields["mode"]["type"] = TrexTxType.continuous.name
-        self.fields["flow_stats"] = {}
-        self.fields["flow_stats"]["enabled"] = False
-        self.set_packet(STLPktBuilder(pkt=Ether() / IP()))
+        # the default packet is built only when needed, as most streams set their own packet right after creation
+        self._fields = {
+            "enabled": True,
+            "next_stream": None,
+            "self_start": True,
+            "action_count": 0,
+            "isg": 0,
+            "flags": 0x0,
+            "mode": {"rate": {"type": TrexRateType.pps.name, "value": 1}, "type": TrexTxType.continuous.name},
+            "flow_stats": dict(_FLOW_STATS_DISABLED),
+            "packet": {},
+            "vm": {},
+        }
+        self.mac_src_override_by_pkt = None
+        self.mac_dst_override_mode = None
+        self.is_default_mac = True
+        self.packet_desc = None
+        self._scapy_pkt_builder = None
+        self._pkt = None
+        self._default_pkt_pending = True
 
     def set_next(self, stream):
-        self.fields["next_stream"] = stream.name if type(stream) == TrexStream else stream
+        self._fields["next_stream"] = stream.name if isinstance(stream, TrexStream) else stream
 
     def set_rate(self, type=TrexRateType.pps, value=1):
-        self.fields["mode"]["rate"] = {}
-        self.fields["mode"]["rate"]["type"] = type.name
-        self.fields["mode"]["rate"]["value"] = value
+        self._fields["mode"]["rate"] = {"type": _RATE_NAMES[type], "value": value}
 
     def set_tx_type(self, type=TrexTxType.continuous, packets=None, ibg=None, count=None):
-        self.fields["mode"]["type"] = type.name
+        self._fields["mode"]["type"] = _TX_NAMES[type]
         if type == TrexTxType.single_burst:
-            self.fields["mode"]["total_pkts"] = packets
-            del_fields(self.fields["mode"], "pkts_per_burst", "ibg", "count")
+            self._fields["mode"]["total_pkts"] = packets
+            del_fields(self._fields["mode"], "pkts_per_burst", "ibg", "count")
         elif type == TrexTxType.multi_burst:
-            self.fields["mode"]["pkts_per_burst"] = packets
-            self.fields["mode"]["ibg"] = ibg
-            self.fields["mode"]["count"] = count
-            del_fields(self.fields["mode"], "total_pkts")
+            self._fields["mode"]["pkts_per_burst"] = packets
+            self._fields["mode"]["ibg"] = ibg
+            self._fields["mode"]["count"] = count
+            del_fields(self._fields["mode"], "total_pkts")
 
     def set_flow_stats(self, type, stream_id=None):
         if type == TrexFlowStatsType.none:
-            self.fields["flow_stats"]["enabled"] = False
-            del_fields(self.fields["flow_stats"], "rule_type", "stream_id")
+            self._fields["flow_stats"] = dict(_FLOW_STATS_DISABLED)
         else:
-            self.fields["flow_stats"]["enabled"] = True
-            self.fields["flow_stats"]["rule_type"] = type.name
-            self.fields["flow_stats"]["stream_id"] = stream_id
+            self._fields["flow_stats"] = {"enabled": True, "rule_type": type.name, "stream_id": stream_id}
 
     def set_packet(
         self,
@@ -124,42 +174,37 @@ class TrexStream(TrexObject):
         # save for easy construct code from stream object
         self.mac_src_override_by_pkt = mac_src_override_by_pkt
         self.mac_dst_override_mode = mac_dst_override_mode
+        self._default_pkt_pending = False
         # self.id = stream_id
 
         if mac_src_override_by_pkt is None:
-            int_mac_src_override_by_pkt = 0
-            if packet and packet.is_default_src_mac() is False:
-                int_mac_src_override_by_pkt = 1
-        else:
-            int_mac_src_override_by_pkt = int(mac_src_override_by_pkt)
-
+            mac_src_override_by_pkt = packet is not None and packet.is_default_src_mac() is False
         if mac_dst_override_mode is None:
-            int_mac_dst_override_mode = 0
-            if packet and packet.is_default_dst_mac() is False:
-                int_mac_dst_override_mode = STLStreamDstMAC_PKT
-        else:
-            int_mac_dst_override_mode = int(mac_dst_override_mode)
+            custom_dst_mac = packet is not None and packet.is_default_dst_mac() is False
+            mac_dst_override_mode = STLStreamDstMAC_PKT if custom_dst_mac else STLStreamDstMAC_CFG_FILE
+        int_mac_src_override_by_pkt = int(mac_src_override_by_pkt)
+        int_mac_dst_override_mode = int(mac_dst_override_mode)
 
         self.is_default_mac = not (int_mac_src_override_by_pkt or int_mac_dst_override_mode)
-
-        self.fields["flags"] = (
-            (int_mac_src_override_by_pkt & 1) + ((int_mac_dst_override_mode & 3) << 1) + (int(dummy_stream) << 3)
+        self._fields["flags"] = (
+            (int_mac_src_override_by_pkt & 1) | ((int_mac_dst_override_mode & 3) << 1) | (int(dummy_stream) << 3)
         )
 
-        if not packet:
-            packet = STLPktBuilder(pkt=Ether() / IP())
+        if packet:
+            packet.compile()
+        else:
+            packet = _default_pkt_builder()
             if dummy_stream:
                 self.packet_desc = "Dummy"
 
-        self.scapy_pkt_builder = packet
-        # packet builder
-        packet.compile()
+        self._scapy_pkt_builder = packet
 
         # packet and VM
-        self.fields["packet"] = packet.dump_pkt()
-        self.fields["vm"] = packet.get_vm_data()
+        self._fields["packet"] = packet.dump_pkt()
+        self._fields["vm"] = packet.get_vm_data()
 
-        self.pkt = base64.b64decode(self.fields["packet"]["binary"])
+        # raw bytes are decoded from the packet field only when needed, most streams are only written to the server
+        self._pkt = None
 
     def config(self, enabled=True, self_start=True, isg=0.0, action_count=0, random_seed=0):
         """Configure stream.
@@ -190,45 +235,73 @@ class TrexStream(TrexObject):
                        If given, the seed for this stream will be this value.
                        Useful if you need a deterministic random value.
         """
-        self.fields["action_count"] = action_count
+        self._fields["action_count"] = action_count
 
         # basic fields
-        self.fields["enabled"] = enabled
-        self.fields["self_start"] = self_start
-        self.fields["isg"] = isg
+        self._fields["enabled"] = enabled
+        self._fields["self_start"] = self_start
+        self._fields["isg"] = isg
 
         if random_seed != 0:
-            self.fields["random_seed"] = random_seed  # optional
+            self._fields["random_seed"] = random_seed  # optional
 
-        # packet
-        self.fields["packet"] = {}
-        self.fields["vm"] = {}
+    def read_stats(self):
+        return self.server.get_stream_statistics().read()[self]
 
-        # this is heavy, calculate lazy
-        self.packet_desc = None
+    @property
+    def fields(self) -> dict:
+        """Return stream fields, with the (default) packet set - changes to the returned dict update the stream."""
+        self._set_default_packet()
+        return self._fields
 
-    def read_stats(self):
-        stream_stats_view = TrexStreamStatistics(self.server)
-        return stream_stats_view.read()[self]
+    @property
+    def pkt(self) -> bytes:
+        """Return packet bytes."""
+        return self.get_pkt()
 
     def to_json(self) -> dict:
         """Return json format."""
         return dict(self.fields)
 
+    def to_json_bytes(self) -> bytes:
+        """Return json format as UTF-8 encoded bytes."""
+        return json_dumps(self.to_json())
+
+    def dump_json(self, buffer: BinaryIO) -> None:
+        """Write stream json to binary file-like buffer.
+
+        :param buffer: binary file-like object to write to.
+        """
+        buffer.write(self.to_json_bytes())
+
     def has_custom_mac_addr(self) -> bool:
         """Return True if src or dst MAC were set as custom."""
         return not self.is_default_mac
 
     def has_flow_stats(self):
         """Return True if stream was configured with flow stats."""
-        return self.fields["flow_stats"]["enabled"]
+        return self._fields["flow_stats"]["enabled"]
+
+    def get_flow_stats_id(self) -> int:
+        """Get flow stats stream ID (pgid), None if stream was configured without flow stats."""
+        return self._fields["flow_stats"].get("stream_id")
+
+    def get_pkt(self) -> bytes:
+        """Get packet bytes."""
+        self._set_default_packet()
+        if self._pkt is None:
+            self._pkt = base64.b64decode(self._fields["packet"]["binary"])
+        return self._pkt
 
     def get_pkt_len(self, count_crc: bool = True) -> int:
         """Get packet number of bytes.
 
         :param count_crc: If True, add 4 bytes for CRC.
         """
-        pkt_len = len(self.get_pkt())
+        self._set_default_packet()
+        # length of the base64 packet field, without decoding it
+        binary = self._fields["packet"]["binary"]
+        pkt_len = len(binary) // 4 * 3 - binary.endswith("=") - binary.endswith("==")
         if count_crc:
             pkt_len += 4
         return pkt_len
@@ -236,27 +309,17 @@ class TrexStream(TrexObject):
     def get_pkt_type(self):
         """Get packet description. Example: IP:UDP."""
         if self.packet_desc is None:
-            self.packet_desc = STLPktBuilder.pkt_layers_desc_from_buffer(self.get_pkt())
+            self.packet_desc = _pkt_layers_desc(self.get_pkt())
 
         return self.packet_desc
 
     @staticmethod
     def get_rate_from_field(rate_json):
         """Get rate from json."""
-        t = rate_json["type"]
-        v = rate_json["value"]
-
-        if t == "pps":
-            return format_num(v, suffix="pps")
-        elif t == "bps_L1":
-            return format_num(v, suffix="bps(L1)")
-        elif t == "bps_L2":
-            return format_num(v, suffix="bps(L2)")
-        elif t == "percentage":
-            return format_num(v, suffix="%")
+        return _rate_desc(rate_json["type"], rate_json["value"])
 
     def get_rate(self):
-        return self.get_rate_from_field(self.fields["mode"]["rate"])
+        return self.get_rate_from_field(self._fields["mode"]["rate"])
 
     def to_pkt_dump(self):
         """Print packet description from Scapy."""
@@ -269,8 +332,27 @@ class TrexStream(TrexObject):
             print("Nothing to dump")
         return dump
 
+    @property
+    def scapy_pkt_builder(self) -> STLPktBuilder:
+        """Return stream packet builder."""
+        self._set_default_packet()
+        return self._scapy_pkt_builder
+
+    @scapy_pkt_builder.setter
+    def scapy_pkt_builder(self, packet: STLPktBuilder) -> None:
+        """Set stream packet builder, without updating the packet fields."""
+        self._scapy_pkt_builder = packet
+        self._default_pkt_pending = False
+
+    def _set_default_packet(self) -> None:
+        """Set default packet if no packet was set since the stream was created."""
+        if self._default_pkt_pending:
+            self.set_packet()
+
 
 class TrexYamlLoader:
+    __slots__ = ("port", "profile_path")
+
     def __init__(self, port, profile_path: Path) -> None:
         self.port = port
         self.profile_path = profile_path
@@ -302,43 +384,44 @@ class TrexYamlLoader:
             stream.set_flow_stats(TrexFlowStatsType.none)
         stream.set_flow_stats(TrexFlowStatsType[flow_stats_obj.get("rule_type", "none")], flow_stats_obj.get("stream_id"))
 
-    def __parse_stream(self, yaml_object: dict) -> TrexStream:
-        # create the stream
+    def __parse_stream(self, stream: TrexStream, yaml_object: dict) -> TrexStream:
         s_obj = yaml_object["stream"] if "stream" in yaml_object else yaml_object
-        stream = self.port.add_stream(name=yaml_object.get("name", f"stream-{len(self.port.streams)}"))
+        s_obj_get = s_obj.get
+        flags = s_obj["flags"]
 
         stream.config(
-            enabled=s_obj.get("enabled", True),
-            self_start=s_obj.get("self_start", True),
-            isg=s_obj.get("isg", 0.0),
-            action_count=s_obj.get("action_count", 0),
+            enabled=s_obj_get("enabled", True),
+            self_start=s_obj_get("self_start", True),
+            isg=s_obj_get("isg", 0.0),
+            action_count=s_obj_get("action_count", 0),
         )
 
         stream.set_next(yaml_object.get("next"))
 
         # mode
-        self.__parse_mode(stream, s_obj.get("mode"))
+        self.__parse_mode(stream, s_obj_get("mode"))
 
         # packet
         self.__parse_packet(
             stream,
             s_obj["packet"],
-            mac_src_override_by_pkt=s_obj["flags"] & 0x01,
-            mac_dst_override_mode=(s_obj["flags"] & 0x06) >> 1,
+            mac_src_override_by_pkt=flags & 0x01,
+            mac_dst_override_mode=(flags & 0x06) >> 1,
         )
 
         # rx stats
-        self.__parse_flow_stats(stream, s_obj.get("flow_stats"))
+        self.__parse_flow_stats(stream, s_obj_get("flow_stats"))
 
-        # hack the VM fields for now
+        # hack the VM fields for now, copied as the loaded profile objects are cached and shared by all its streams
         if "vm" in s_obj:
-            stream.fields["vm"].update(s_obj["vm"])
+            stream.fields["vm"].update(copy.deepcopy(s_obj["vm"]))
 
         return stream
 
     def parse(self) -> list:
         """Read YAML and pass it down to stream object."""
-        with open(self.profile_path, "r") as yaml_file:
-            objects = yaml.safe_load(yaml_file.read())
-        streams = [self.__parse_stream(obj) for obj in objects]
-        return streams
+        profile_path = Path(self.profile_path).resolve()
+        objects = _load_profile(str(profile_path), profile_path.stat().st_mtime_ns)
+        # create all streams at once, then configure each one
+        streams = self.port.add_streams([obj.get("name") for obj in objects])
+        return [self.__parse_stream(stream, obj) for stream, obj in zip(streams, objects)]
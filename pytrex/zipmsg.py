@@ -8,13 +8,15 @@ class ZippedMsg:
 
     MSG_COMPRESS_THRESHOLD = 256
     MSG_COMPRESS_HEADER_MAGIC = 0xABE85CEA
+    # fastest level, JSON messages compress well even so
+    MSG_COMPRESS_LEVEL = 1
 
     def check_threshold(self, msg):
         return len(msg) >= self.MSG_COMPRESS_THRESHOLD
 
     def compress(self, msg):
         # compress
-        compressed = zlib.compress(msg)
+        compressed = zlib.compress(msg, self.MSG_COMPRESS_LEVEL)
         new_msg = struct.pack(">II", self.MSG_COMPRESS_HEADER_MAGIC, len(msg)) + compressed
         return new_msg
 
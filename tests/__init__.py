@@ -2,12 +2,17 @@
 Tests for pytrex package.
 """
 import getpass
+from pathlib import Path
 
 from trafficgenerator import TgnSutUtils, set_logger
 from trafficgenerator.tgn_server import Server
 
 from pytrex.trex_app import TrexApp
 
+PROFILES_DIR = Path(__file__).parent.joinpath("profiles").resolve()
+TEST_PROFILE_0 = PROFILES_DIR.joinpath("test_profile_0.yaml")
+TEST_PROFILE_1 = PROFILES_DIR.joinpath("test_profile_1.yaml")
+
 
 class TrexSutUtils(TgnSutUtils):
     """IxTRex SUT utilities."""
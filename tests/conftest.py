@@ -1,14 +1,21 @@
 """
 Pytest conftest for trex package testing.
 """
-from typing import Iterable
+import json
+from typing import Callable, Iterable
 
 import pytest
-from trafficgenerator.tgn_conftest import log_level, pytest_addoption, sut  # pylint: disable=unused-import
+from trafficgenerator.tgn_object import TgnSubStatsDict
 
 from pytrex import TrexError
 from pytrex.trex_app import TrexApp
-from tests import TrexSutUtils
+from pytrex.trex_port import TrexPort
+from tests import TEST_PROFILE_0, TEST_PROFILE_1, TrexSutUtils
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add --verbose-stats, trafficgenerator options are added by the tgn_conftest plugin."""
+    parser.addoption("--verbose-stats", action="store_true", default=False, help="Print statistics read by tests")
 
 
 @pytest.fixture(scope="session")
@@ -35,3 +42,29 @@ def trex(sut_utils: TrexSutUtils) -> Iterable[TrexApp]:
 def ports(sut_utils: TrexSutUtils) -> list[int]:
     """Yield TRex device under test ports locations."""
     return sut_utils.locations()
+
+
+@pytest.fixture(scope="session")
+def trex_ports(trex: TrexApp, ports: list[int]) -> dict[int, TrexPort]:
+    """Yield TRex ports, reserved once for the whole session."""
+    return trex.server.reserve_ports(ports, force=True)
+
+
+@pytest.fixture
+def profile_ports(trex_ports: dict[int, TrexPort]) -> list[TrexPort]:
+    """Yield TRex ports loaded with test_profile_0 and test_profile_1 streams."""
+    port_0, port_1 = trex_ports.values()
+
+    for port, profile in ((port_0, TEST_PROFILE_0), (port_1, TEST_PROFILE_1)):
+        port.remove_all_streams()
+        port.load_streams(profile)
+    port_0.server.write_streams(port_0, port_1)
+    return [port_0, port_1]
+
+
+@pytest.fixture(scope="session")
+def dump_stats(pytestconfig: pytest.Config) -> Callable[[dict], None]:
+    """Yield function that prints statistics, does nothing unless --verbose-stats is set."""
+    if not pytestconfig.getoption("--verbose-stats"):
+        return lambda stats: None
+    return lambda stats: print(stats.dumps(indent=2) if isinstance(stats, TgnSubStatsDict) else json.dumps(stats, indent=2))
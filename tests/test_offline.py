@@ -0,0 +1,55 @@
+"""
+pytrex tests that do not require TRex server.
+"""
+import pytest
+from scapy.layers.inet import IP
+from scapy.layers.l2 import Ether
+from scapy.packet import Raw
+
+from pytrex.trex_app import TrexServer
+from pytrex.trex_port import TrexPort, decode_multiplier
+from pytrex.trex_stl_packet_builder_scapy import STLPktBuilder
+from pytrex.trex_stream import TrexStream
+
+
+@pytest.fixture
+def stream() -> TrexStream:
+    """Yield stream of a port of a disconnected server."""
+    server = TrexServer("offline", "localhost")
+    server.session_id = 0
+    return TrexPort(server=server, index=0).add_stream("offline")
+
+
+@pytest.mark.parametrize(
+    "val, divide_count, expected",
+    [
+        ("10%", 1, {"type": "percentage", "value": 10.0, "op": "abs"}),
+        ("10%", 2, {"type": "percentage", "value": 10.0, "op": "abs"}),
+        ("10kbps", 4, {"type": "bps", "value": 2_500.0, "op": "abs"}),
+        ("1mpps", 2, {"type": "pps", "value": 500_000.0, "op": "abs"}),
+        ("100bpsl1", 4, {"type": "bpsl1", "value": 25.0, "op": "abs"}),
+        ("6", 3, {"type": "raw", "value": 2.0, "op": "abs"}),
+    ],
+)
+def test_decode_multiplier(val: str, divide_count: int, expected: dict) -> None:
+    """Test that multiplier is divided between ports, except for percentage that is relative to each port line rate."""
+    assert decode_multiplier(val, divide_count=divide_count) == expected
+
+
+def test_decode_multiplier_update() -> None:
+    """Test multiplier updates and invalid multipliers."""
+    assert decode_multiplier("2gbps+", allow_update=True, divide_count=2) == {"type": "bps", "value": 1e9, "op": "add"}
+    assert decode_multiplier("5%-", allow_update=True, divide_count=2) == {"type": "percentage", "value": 5.0, "op": "sub"}
+    assert decode_multiplier("2gbps+", allow_update=False) is None
+    assert decode_multiplier("2xbps") is None
+
+
+@pytest.mark.parametrize("pkt_len", [60, 61, 62, 63, 64])
+def test_pkt_len(stream: TrexStream, pkt_len: int) -> None:
+    """Test packet length calculated from base64 packet binary, with 0, 1 and 2 padding characters."""
+    packet = Ether() / IP() / Raw(bytes(pkt_len - 34))
+    assert len(packet) == pkt_len
+    stream.set_packet(STLPktBuilder(pkt=packet))
+    assert stream.get_pkt_len(count_crc=False) == pkt_len
+    assert stream.get_pkt_len() == pkt_len + 4
+    assert stream.get_pkt_len(count_crc=False) == len(stream.get_pkt())